@@ -1,29 +1,33 @@
-import collections
 import sys
-import urllib.request
-import urllib.error
 
 from mutagen.id3 import ID3, TPE1, TIT2, TALB, APIC
+import urllib3
 
-Song = collections.namedtuple(typename="Song", field_names=["artist", "title", "album"])
+# retry connection errors and transient server errors with an exponential backoff, the last response is still returned
+# to report its error code below
+http = urllib3.PoolManager(
+    retries=urllib3.Retry(3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504), raise_on_status=False)
+)
 
 mp3 = sys.argv[1]
 url = sys.argv[2]
 
 audio = ID3(mp3)
-song = Song(
-    artist=audio.getall("TPE1")[0].text[0],
-    title=audio.getall("TIT2")[0].text[0],
-    album=audio.getall("TALB")[0].text[0],
-)
+artist = audio.getall("TPE1")[0].text[0]
+title = audio.getall("TIT2")[0].text[0]
+album = audio.getall("TALB")[0].text[0]
 audio.clear()
-audio.add(TPE1(encoding=3, text=song.artist))
-audio.add(TIT2(encoding=3, text=song.title))
-audio.add(TALB(encoding=3, text=song.album))
-try:
-    with urllib.request.urlopen(url) as cover:
-        content_type = cover.info().get_content_type()
-        audio.add(APIC(encoding=3, mime=content_type, type=3, desc="Cover", data=cover.read()))
-except urllib.error.HTTPError as error:
-    print(f"cover download failed and returned HTTP error code {error.code} with reason: {error.reason}")
+audio.update(
+    {
+        "TPE1": TPE1(encoding=3, text=artist),
+        "TIT2": TIT2(encoding=3, text=title),
+        "TALB": TALB(encoding=3, text=album),
+    }
+)
+cover = http.request("GET", url)
+if cover.status < 400:
+    content_type = cover.headers.get("Content-Type", "image/jpeg").split(";")[0].strip()
+    audio.add(APIC(encoding=3, mime=content_type, type=3, desc="Cover", data=cover.data))
+else:
+    print(f"cover download failed and returned HTTP error code {cover.status} with reason: {cover.reason}")
 audio.save()
@@ -2,21 +2,30 @@
 
 from __future__ import annotations
 
-from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter, ArgumentTypeError
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
 from dataclasses import dataclass
-import distutils.util
 from enum import Enum, IntEnum, auto
+import functools
+import hashlib
+import json
 import logging
 import os
+import queue
+import re
 import shutil
+import sqlite3
 import subprocess
 import sys
-from typing import Any, Iterable, Optional
+import tempfile
+import time
+from types import ModuleType
+from typing import Any, Iterable, Iterator, Optional
 
-import acoustid
 from dotenv import load_dotenv
-from fuzzywuzzy import fuzz
 from mutagen.id3 import ID3, TPE1, TIT2, TALB, APIC
+from rapidfuzz import fuzz, process, utils
 
 
 class ExitCode(IntEnum):
@@ -27,6 +36,14 @@ class ExitCode(IntEnum):
 load_dotenv()
 ACOUSTID_APPLICATION_API_KEY = os.getenv("ACOUSTID_APPLICATION_API_KEY")
 ACOUSTID_USER_API_KEY = os.getenv("ACOUSTID_USER_API_KEY")
+ACOUSTID_META = "recordings releasegroups"
+ACOUSTID_CACHE_FILE = os.path.join(
+    os.getenv("XDG_CACHE_HOME", os.path.expanduser(os.path.join("~", ".cache"))), "music-tagger", "acoustid.sqlite"
+)
+# refresh cached responses after 30 days to pick up improved metadata of the web service
+ACOUSTID_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+# fingerprints are keyed by file content and never become outdated, so only limit their number to bound the cache size
+FINGERPRINT_CACHE_SIZE = 10000
 
 logger = logging.getLogger(__name__)
 # prevent duplicate logging messages by not propagating to the root logger (see: https://stackoverflow.com/a/44426266)
@@ -37,6 +54,14 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+@functools.cache
 def get_argument_parser() -> ArgumentParser:
     # fmt: off
     parser = ArgumentParser(description="Download and parse videos to tagged and normalized MP3 audio files", formatter_class=ArgumentDefaultsHelpFormatter)
@@ -47,52 +72,57 @@ def get_argument_parser() -> ArgumentParser:
     parser.add_argument("-k", "--keep", action="store_true", help="Keep original MP3 files instead of overwriting them")
     parser.add_argument("-s", "--skip", action="store_true", help="Skip processing of unconfident song matches and instead place them in a seperate directory (see: -d/--skipped-directory)")
     parser.add_argument("-sd", "--skip-directory", metavar="DIRECTORY", default="skipped", help="Custom output directory to place skipped song matches in (only used in conjunction with -s/--skip)")
+    parser.add_argument("-j", "--jobs", metavar="NUMBER", type=positive_int, default=os.cpu_count(), help="Number of mp3files to fingerprint, tag and normalize concurrently")
+    parser.add_argument("-lt", "--loudness-tolerance", metavar="LU", type=float, help="Skip normalization of MP3 files whose integrated loudness already is within the given tolerance of the default EBU R128 target level of -23 LUFS (requires an additional loudness measurement per file and ignores target levels passed via -ef/--extra-ffmpeg-normalize)")
     parser.add_argument("-v", "--verbose", action="count", default=0, help="Set the verbosity level of the program")
-    parser.add_argument("-ey", "--extra-youtube-dl", metavar="ARGUMENT", nargs="+", default=[], help="Additional arguments passed for youtube-dl invocation (arguments starting with one or more dashes need to be prepended with a space to circumvent argparse)")
-    parser.add_argument("-ef", "--extra-ffmpeg-normalize", metavar="ARGUMENT", nargs="+", default=[], help="Additional arguments passed for ffmpeg-normalize invocation (arguments starting with one or more dashes need to be prepended with a space to circumvent argparse)")
-    parser.add_argument("-es", "--extra-sacad", metavar="ARGUMENT", nargs="+", default=[], help="Additional arguments passed for sacad invocation (arguments starting with one or more dashes need to be prepended with a space to circumvent argparse)")
+    parser.add_argument("-ey", "--extra-youtube-dl", metavar="ARGUMENT", nargs="+", type=str.lstrip, default=[], help="Additional arguments passed for youtube-dl invocation (arguments starting with one or more dashes need to be prepended with a space to circumvent argparse)")
+    parser.add_argument("-ef", "--extra-ffmpeg-normalize", metavar="ARGUMENT", nargs="+", type=str.lstrip, default=[], help="Additional arguments passed for ffmpeg-normalize invocation (arguments starting with one or more dashes need to be prepended with a space to circumvent argparse)")
+    parser.add_argument("-es", "--extra-sacad", metavar="ARGUMENT", nargs="+", type=str.lstrip, default=[], help="Additional arguments passed for sacad invocation (arguments starting with one or more dashes need to be prepended with a space to circumvent argparse)")
     parser.add_argument("-m", "--manual", action="store_true", help="Always query the user for manual corrections even if automatic MP3 tagging finished confidently")
     # fmt: on
     return parser
 
 
-def download_mp3files(urls, download_directory, extra_args):
-    process = subprocess.run(
-        [
-            "yt-dlp",
-            "--extract-audio",
-            "--audio-format",
-            "mp3",
-            "--audio-quality",
-            "0",
-            *urls,
-            "--output",
-            os.path.join(download_directory, "%(title)s.%(ext)s"),  # set filename to video title
-            # append extra arguments
-            *(extra_arg.lstrip() for extra_arg in extra_args),
-        ],
-        # create readable unified output to aid debugging
-        stderr=subprocess.STDOUT,
-        stdout=subprocess.PIPE,
-        text=True,
-    )
-    if process.returncode != ExitCode.SUCCESS:
-        logger.error(f"subprocess {process.args} failed with exit code {process.returncode}:\n{process.stdout}")
-        sys.exit(ExitCode.FAILURE)
-
-    # extract filenames of written mp3 files from output
-    lines = process.stdout.splitlines()
-    mp3files = [line.split(sep=" ", maxsplit=2)[-1] for line in lines if "Destination" in line and "mp3" in line]
-    return mp3files
+YT_DLP_COMMAND = (
+    "yt-dlp",
+    "--extract-audio",
+    "--audio-format",
+    "mp3",
+    "--audio-quality",
+    "0",
+    # print only the final filenames of written mp3 files to stdout
+    "--print",
+    "after_move:filepath",
+)
+
+
+def download_mp3files(urls, download_directory, extra_args) -> Iterator[str]:
+    # buffer diagnostics in a file instead of a pipe, which could fill up while stdout is still being read
+    with tempfile.TemporaryFile(mode="w+") as stderr:
+        with subprocess.Popen(
+            [
+                *YT_DLP_COMMAND,
+                *urls,
+                "--output",
+                os.path.join(download_directory, "%(title)s.%(ext)s"),  # set filename to video title
+                *extra_args,
+            ],
+            stderr=stderr,
+            stdout=subprocess.PIPE,
+            text=True,
+        ) as process:
+            # yield every mp3file as soon as it is written to allow processing it while the others still download
+            for line in process.stdout:
+                yield line.rstrip("\n")
+
+        if process.returncode != ExitCode.SUCCESS:
+            stderr.seek(0)
+            logger.error(f"subprocess {process.args} failed with exit code {process.returncode}:\n{stderr.read()}")
+            sys.exit(ExitCode.FAILURE)
 
 
 def parse_artist(artists: Iterable[Any]) -> str:
-    artist_joined = ""
-    for artist in artists:
-        artist_joined += artist["name"]
-        if "joinphrase" in artist:
-            artist_joined += artist["joinphrase"]
-    return artist_joined
+    return "".join(artist["name"] + artist.get("joinphrase", "") for artist in artists)
 
 
 class AcoustidReleaseType(Enum):
@@ -114,6 +144,13 @@ class ReleaseTypeScore(IntEnum):
     OTHER = 0
 
 
+RELEASE_TYPE_SCORES = {
+    AcoustidReleaseType.ALBUM: ReleaseTypeScore.ALBUM,
+    AcoustidReleaseType.SINGLE: ReleaseTypeScore.SINGLE,
+    AcoustidReleaseType.OTHER: ReleaseTypeScore.OTHER,
+}
+
+
 def parse_types(type: str, secondarytypes: list[str]) -> list[AcoustidReleaseType]:
     return [AcoustidReleaseType.get(type.upper(), AcoustidReleaseType.OTHER)] + [
         AcoustidReleaseType.get(secondarytype.upper(), AcoustidReleaseType.OTHER) for secondarytype in secondarytypes
@@ -158,99 +195,226 @@ class AcoustidResult:
     @classmethod
     def from_json(cls, json: dict[str, Any]) -> AcoustidResult:
         return cls(
-            score=json.get("score", 0.0),
+            score=json["score"],
             recordings=[AcoustidRecording.from_json(recording) for recording in json.get("recordings", [])],
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Score:
     audio: float
     file: int
     type: ReleaseTypeScore
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Song:
     artist: str
     title: str
     album: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Match:
     song: Song
     score: Score
 
-    def is_confident(self) -> bool:
-        return self.score.audio >= 0.40 and self.score.file >= 70 and self.score.type >= ReleaseTypeScore.SINGLE
-
+    CONFIDENT_AUDIO_SCORE = 0.40
+    CONFIDENT_FILE_SCORE = 70
 
-def find_album(releases: list[AcoustidRelease]) -> Optional[AcoustidRelease]:
-    for release in releases:
-        if len(release.types) == 1 and release.types[0] == AcoustidReleaseType.ALBUM:
-            return release
-    return None
+    def is_confident(self) -> bool:
+        return (
+            self.score.audio >= Match.CONFIDENT_AUDIO_SCORE
+            and self.score.file >= Match.CONFIDENT_FILE_SCORE
+            and self.score.type >= ReleaseTypeScore.SINGLE
+        )
 
 
-def find_single(releases: list[AcoustidRelease]) -> Optional[AcoustidRelease]:
+def find_release(releases: list[AcoustidRelease]) -> Optional[AcoustidRelease]:
+    # prefer the first pure album and fall back to the first pure single within one pass over the releases
+    single = None
     for release in releases:
-        if len(release.types) == 1 and release.types[0] == AcoustidReleaseType.SINGLE:
+        if len(release.types) != 1:
+            continue
+        if release.types[0] == AcoustidReleaseType.ALBUM:
             return release
-    return None
+        if release.types[0] == AcoustidReleaseType.SINGLE and single is None:
+            single = release
+    return single
 
 
 def find_best_match(results: list[AcoustidResult], mp3basename: str) -> Match:
-    matches = [Match(Song("", "", ""), Score(0.0, 0, ReleaseTypeScore.OTHER))]
-    for result in results:
-        for recording in result.recordings:
-            file_score = score_recording_for_file(recording, mp3basename)
-
-            release = (
-                find_album(recording.releases)
-                or find_single(recording.releases)
-                or AcoustidRelease("", f"{recording.title} - Single", [AcoustidReleaseType.OTHER])
+    candidates = [(result, recording) for result in results for recording in result.recordings]
+    names = [f"{recording.artist} - {recording.title}" for _, recording in candidates]
+    # the same recording is often returned for several results, so score every distinct name only once
+    distinct_names = list(dict.fromkeys(names))
+    # score all names against the basename in a single call, which also normalizes the basename only once
+    scores = process.cdist(
+        [mp3basename],
+        distinct_names,
+        scorer=fuzz.token_set_ratio,
+        processor=utils.default_process,
+    )[0].tolist()
+    # round to an int score
+    file_scores = {name: round(score) for name, score in zip(distinct_names, scores)}
+
+    best_match = Match(Song("", "", ""), Score(0.0, 0, ReleaseTypeScore.OTHER))
+    best_key = 0
+    for (result, recording), name in zip(candidates, names):
+        file_score = file_scores[name]
+        # skip searching the releases if even an album could not beat the best match so far
+        if file_score * 1000 + ReleaseTypeScore.ALBUM <= best_key:
+            continue
+        release = find_release(recording.releases)
+        type_score = RELEASE_TYPE_SCORES[release.types[0]] if release else ReleaseTypeScore.OTHER
+
+        # only build a match for candidates beating the best one so far, ties keep the earlier candidate
+        key = file_score * 1000 + type_score
+        if key > best_key:
+            album = release.title if release else f"{recording.title} - Single"
+            best_match = Match(
+                song=Song(recording.artist, recording.title, album),
+                score=Score(audio=result.score, file=file_score, type=type_score),
             )
+            best_key = key
+            # nothing can beat a perfect file score of an album release
+            if best_key == 100 * 1000 + ReleaseTypeScore.ALBUM:
+                break
 
-            song = Song(recording.artist, recording.title, release.title)
-            score = Score(
-                audio=result.score,
-                file=file_score,
-                type=ReleaseTypeScore[release.types[0].name],
-            )
-            matches.append(Match(song=song, score=score))
+    return best_match
+
+
+@functools.cache
+def create_cache():
+    # memoized to create the tables once per run
+    os.makedirs(os.path.dirname(ACOUSTID_CACHE_FILE), exist_ok=True)
+    with closing(sqlite3.connect(ACOUSTID_CACHE_FILE)) as connection, connection:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS lookups (key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS corrections "
+            "(key TEXT PRIMARY KEY, artist TEXT NOT NULL, title TEXT NOT NULL, album TEXT NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints "
+            "(key TEXT PRIMARY KEY, duration REAL NOT NULL, fingerprint BLOB NOT NULL, created REAL NOT NULL)"
+        )
+
+
+def execute_cache(*statements: tuple[str, tuple[Any, ...]]) -> list[Any]:
+    # the cache is optional, so failing to access it only logs a warning and reports no rows
+    try:
+        create_cache()
+        with closing(sqlite3.connect(ACOUSTID_CACHE_FILE)) as connection, connection:
+            rows = []
+            for statement, parameters in statements:
+                rows = connection.execute(statement, parameters).fetchall()
+            return rows
+    except (sqlite3.Error, OSError) as error:
+        logger.warning(f"could not access cache file {ACOUSTID_CACHE_FILE}: {error}")
+        return []
+
+
+def get_fingerprint_key(duration: float, fingerprint: bytes) -> str:
+    return f"{duration}:{hashlib.sha1(fingerprint).hexdigest()}"
 
-    return max(matches, key=lambda match: match.score.file * 1000 + match.score.type)
 
+def get_acoustid() -> ModuleType:
+    # import lazily to not pay for loading the http stack of acoustid when e.g. only printing the help message
+    import acoustid
 
-def score_recording_for_file(recording: AcoustidRecording, basename: str) -> int:
-    return fuzz.token_set_ratio(f"{recording.artist} - {recording.title}", basename)
+    return acoustid
+
+
+def lookup_fingerprint(duration: float, fingerprint: bytes) -> Any:
+    # cache successful responses by fingerprint to skip the web service when processing the same audio again, the
+    # requested metadata is part of the key to invalidate cached responses whenever it changes
+    key = f"{ACOUSTID_META}:{get_fingerprint_key(duration, fingerprint)}"
+    now = time.time()
+    rows = execute_cache(
+        ("SELECT response FROM lookups WHERE key = ? AND created > ?", (key, now - ACOUSTID_CACHE_MAX_AGE))
+    )
+    if rows:
+        logger.debug(f"using cached acoustid response for fingerprint: {key}")
+        return json.loads(rows[0][0])
+
+    response = get_acoustid().lookup(ACOUSTID_APPLICATION_API_KEY, fingerprint, duration, meta=ACOUSTID_META)
+    if response.get("status") == "ok":
+        execute_cache(
+            # evict expired responses
+            ("DELETE FROM lookups WHERE created <= ?", (now - ACOUSTID_CACHE_MAX_AGE,)),
+            ("INSERT OR REPLACE INTO lookups VALUES (?, ?, ?)", (key, json.dumps(response), now)),
+        )
+    return response
+
+
+def hash_file(filename) -> str:
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(functools.partial(file.read, 1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint_file(mp3file) -> tuple[float, bytes]:
+    # cache fingerprints by file content, hashing a file is much cheaper than decoding it for chromaprint
+    key = hash_file(mp3file)
+    rows = execute_cache(("SELECT duration, fingerprint FROM fingerprints WHERE key = ?", (key,)))
+    if rows:
+        logger.debug(f"using cached fingerprint for mp3file: {mp3file}")
+        return rows[0][0], rows[0][1]
+
+    duration, fingerprint = get_acoustid().fingerprint_file(mp3file)
+    execute_cache(
+        ("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?)", (key, duration, fingerprint, time.time())),
+        # evict the oldest fingerprints
+        (
+            "DELETE FROM fingerprints WHERE key NOT IN (SELECT key FROM fingerprints ORDER BY created DESC LIMIT ?)",
+            (FINGERPRINT_CACHE_SIZE,),
+        ),
+    )
+    return duration, fingerprint
 
 
 def fingerprint_mp3file(mp3file):
-    response: Any = acoustid.match(ACOUSTID_APPLICATION_API_KEY, mp3file, parse=False, meta="recordings releasegroups")
-    results = [AcoustidResult.from_json(result) for result in response["results"]]
-    results = [result for result in results if len(result.recordings) > 0]
+    duration, fingerprint = fingerprint_file(mp3file)
+    response = lookup_fingerprint(duration, fingerprint)
+    # validate the response once, afterwards only genuinely optional fields need defaults
+    if response.get("status") != "ok":
+        logger.error(f"acoustid lookup failed for mp3file {mp3file}: {response.get('error', {}).get('message')}")
+        sys.exit(ExitCode.FAILURE)
+    # drop results without recordings before building any dataclasses for them
+    results = [AcoustidResult.from_json(result) for result in response["results"] if result.get("recordings")]
     match = find_best_match(results, os.path.basename(mp3file))
-    return match.song, match.is_confident()
+    # return the fingerprint as well to reuse it for a potential submission of user corrections
+    return match.song, match.is_confident(), duration, fingerprint
+
+
+# accept the usual spellings of yes and no
+BOOL_ANSWERS = {
+    **dict.fromkeys(("y", "yes", "t", "true", "on", "1"), True),
+    **dict.fromkeys(("n", "no", "f", "false", "off", "0"), False),
+}
 
 
 def bool_input(prompt: str) -> bool:
     while True:
-        try:
-            return bool(distutils.util.strtobool(input(prompt)))
-        except ValueError:
-            print("Please answer y(es) or n(o)!")
+        answer = BOOL_ANSWERS.get(input(prompt).strip().lower())
+        if answer is not None:
+            return answer
+        print("Please answer y(es) or n(o)!")
 
 
-def ask_user(mp3file: str, song: Song):
+def ask_user(mp3file: str, song: Song, duration: float, fingerprint: bytes) -> tuple[Song, bool]:
     print("Auto tagging finished with a low confidence level")
     print(f"Filename: {os.path.basename(mp3file)}")
     print(f"Artist: {song.artist}")
     print(f"Title: {song.title}")
     print(f"Album: {song.album}")
 
-    if bool_input("Perform manual adjustments? "):
+    adjusted = bool_input("Perform manual adjustments? ")
+    if adjusted:
         print("Leave individual fields blank to keep the old value")
         artist = input("New Artist: ") or song.artist
         title = input("New Title: ") or song.title
@@ -258,7 +422,6 @@ def ask_user(mp3file: str, song: Song):
         song = Song(artist, title, album)
 
         if bool_input("Submit new MP3 tags to the AcoustID web service? "):
-            duration, fingerprint = acoustid.fingerprint_file(mp3file)
             mp3data = {
                 "duration": duration,
                 "fingerprint": fingerprint,
@@ -268,45 +431,134 @@ def ask_user(mp3file: str, song: Song):
                 "albumartist": artist,
                 "fileformat": "MP3",
             }
-            acoustid.submit(ACOUSTID_APPLICATION_API_KEY, ACOUSTID_USER_API_KEY, mp3data)
+            get_acoustid().submit(ACOUSTID_APPLICATION_API_KEY, ACOUSTID_USER_API_KEY, mp3data)
+
+    return song, adjusted
+
+
+def load_correction(duration: float, fingerprint: bytes) -> Optional[Song]:
+    rows = execute_cache(
+        ("SELECT artist, title, album FROM corrections WHERE key = ?", (get_fingerprint_key(duration, fingerprint),))
+    )
+    return Song(*rows[0]) if rows else None
+
 
-    return song
+def save_correction(duration: float, fingerprint: bytes, song: Song):
+    execute_cache(
+        (
+            "INSERT OR REPLACE INTO corrections VALUES (?, ?, ?, ?)",
+            (get_fingerprint_key(duration, fingerprint), song.artist, song.title, song.album),
+        )
+    )
+
+
+def overwrites_original(source, destination, keep_original) -> bool:
+    if not os.path.exists(destination) or not os.path.samefile(source, destination):
+        return False
+    if keep_original:
+        logger.warning(
+            f"although -k/--keep is specified, the mp3file {source} will be overwritten due to the output directory"
+        )
+    return True
 
 
 def copy_or_move(source, destination, keep_original):
+    if overwrites_original(source, destination, keep_original):
+        return
     if keep_original:
-        try:
-            shutil.copy2(source, destination)
-        except shutil.SameFileError:
-            logger.warning(
-                f"although -k/--keep is specified, the mp3file {source} will be overwritten due to the output directory"
-            )
+        shutil.copy2(source, destination)
     else:
-        os.replace(source, destination)
+        # renames within a filesystem and otherwise falls back to a copy, which uses sendfile on linux
+        shutil.move(source, destination)
 
 
-def rename_mp3file(mp3file, song, output_directory, keep_original):
-    os.makedirs(output_directory, exist_ok=True)
+def remove_original(source, destination, keep_original):
+    if not overwrites_original(source, destination, keep_original) and not keep_original:
+        os.remove(source)
+
+
+def get_song_file(song, output_directory):
     # cannot use / directly in a filename but the unicode character for division ⧸ can be
-    new_file = os.path.join(output_directory, f"{song.artist} - {song.title}.mp3".replace("/", "⧸"))
-    copy_or_move(mp3file, new_file, keep_original)
-    return new_file
+    return os.path.join(output_directory, f"{song.artist} - {song.title}.mp3".replace("/", "⧸"))
+
 
+COVER_IMAGE_SIZE = 600
+SACAD_COMMAND = ("sacad", "--verbosity", "quiet")
+
+
+def download_cover(artist: str, album: str, extra_args: list[str]) -> Optional[bytes]:
+    # use a private temporary directory to allow concurrent downloads and guarantee the cleanup of the cover
+    with tempfile.TemporaryDirectory() as cover_directory:
+        filename = os.path.join(cover_directory, "Cover.jpeg")
+        process = subprocess.run(
+            [*SACAD_COMMAND, artist, album, f"{COVER_IMAGE_SIZE}", filename, *extra_args],
+            # create readable unified output to aid debugging
+            stderr=subprocess.STDOUT,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        if process.returncode != ExitCode.SUCCESS:
+            logger.error(f"subprocess {process.args} failed with exit code {process.returncode}:\n{process.stdout}")
+            sys.exit(ExitCode.FAILURE)
+
+        # sacad succeeds without writing a file if no cover could be found
+        if not os.path.exists(filename):
+            return None
+        with open(filename, "rb") as cover:
+            return cover.read()
+
+
+def add_cover(audio: ID3, mp3file: str, cover: Optional[bytes]):
+    if cover is not None:
+        audio.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=cover))
+    else:
+        logger.warning(f"could not get cover art for mp3file: {mp3file}")
+
+
+# reserve enough space to replace the cover later on (e.g. with edit-cover.py) without rewriting the audio data
+ID3_PADDING = 64 * 1024
+
+
+def write_mp3tags(mp3file: str, song: Song, cover: Optional[bytes]):
+    # all existing tags are replaced, so skip parsing them and start with an empty tag
+    audio = ID3()
+    audio.update(
+        {
+            "TPE1": TPE1(encoding=3, text=song.artist),
+            "TIT2": TIT2(encoding=3, text=song.title),
+            "TALB": TALB(encoding=3, text=song.album),
+        }
+    )
+    add_cover(audio, mp3file, cover)
+    audio.save(mp3file, padding=lambda info: max(info.padding, ID3_PADDING))
 
-def download_cover(artist: str, album: str, filename: str, extra_args: list[str]):
-    COVER_IMAGE_SIZE = 600
+
+FFMPEG_NORMALIZE_COMMAND = (
+    "ffmpeg-normalize",
+    "--quiet",
+    # read and write an mp3 file
+    "--audio-codec",
+    "libmp3lame",
+    # use highest quality
+    "--audio-bitrate",
+    "320k",
+    # allow overwriting existing files and inplace normalization
+    "--force",
+)
+
+
+def normalize_mp3file(mp3file, new_file, extra_args):
     process = subprocess.run(
         [
-            "sacad",
-            "--verbosity",
-            "quiet",
-            artist,
-            album,
-            f"{COVER_IMAGE_SIZE}",
-            filename,
-            # append extra arguments
-            *(extra_arg.lstrip() for extra_arg in extra_args),
+            *FFMPEG_NORMALIZE_COMMAND,
+            mp3file,
+            "--output",
+            new_file,
+            *extra_args,
         ],
+        # ffmpeg-normalize encodes into a temporary directory first, keep it on the filesystem of the new file to move
+        # the result with a rename
+        env={**os.environ, "TMPDIR": os.path.dirname(os.path.abspath(new_file))},
         # create readable unified output to aid debugging
         stderr=subprocess.STDOUT,
         stdout=subprocess.PIPE,
@@ -317,46 +569,14 @@ def download_cover(artist: str, album: str, filename: str, extra_args: list[str]
         sys.exit(ExitCode.FAILURE)
 
 
-def add_cover(audio: ID3, song: Song, extra_sacad: list[str]):
-    COVER_FILENAME = "Cover.jpeg"
-    download_cover(song.artist, song.album.removesuffix(" - Single"), COVER_FILENAME, extra_sacad)
-    if os.path.exists(COVER_FILENAME):
-        with open(COVER_FILENAME, "rb") as cover:
-            audio.add(APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=cover.read()))
-        os.remove(COVER_FILENAME)
-    else:
-        logger.warning(f"could not get cover art for mp3file: {audio.filename}")
-
-
-def write_mp3tags(mp3file: str, song: Song, extra_sacad: list[str]):
-    audio = ID3(mp3file)
-    audio.clear()
-    audio.add(TPE1(encoding=3, text=song.artist))
-    audio.add(TIT2(encoding=3, text=song.title))
-    audio.add(TALB(encoding=3, text=song.album))
-    add_cover(audio, song, extra_sacad)
-    audio.save()
+# default target level of ffmpeg-normalize according to EBU R128
+LOUDNESS_TARGET = -23.0
+INTEGRATED_LOUDNESS_PATTERN = re.compile(r"I:\s+(-?\d+(?:\.\d+)?) LUFS")
 
 
-def normalize_mp3file(mp3file, extra_args):
+def measure_loudness(mp3file) -> float:
     process = subprocess.run(
-        [
-            "ffmpeg-normalize",
-            "--quiet",
-            mp3file,
-            # read and write an mp3 file
-            "--audio-codec",
-            "libmp3lame",
-            # use highest quality
-            "--audio-bitrate",
-            "320k",
-            # perform inplace normalization
-            "--output",
-            mp3file,
-            "--force",
-            # append extra arguments
-            *(extra_arg.lstrip() for extra_arg in extra_args),
-        ],
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", mp3file, "-vn", "-af", "ebur128", "-f", "null", "-"],
         # create readable unified output to aid debugging
         stderr=subprocess.STDOUT,
         stdout=subprocess.PIPE,
@@ -366,55 +586,149 @@ def normalize_mp3file(mp3file, extra_args):
         logger.error(f"subprocess {process.args} failed with exit code {process.returncode}:\n{process.stdout}")
         sys.exit(ExitCode.FAILURE)
 
-
-def modify_mp3file(mp3file, song, output_directory, keep_original, extra_sacad, extra_ffmpeg):
-    mp3file = rename_mp3file(mp3file, song, output_directory, keep_original)
+    # the last reported integrated loudness is the one of the summary over the whole file
+    return float(INTEGRATED_LOUDNESS_PATTERN.findall(process.stdout)[-1])
+
+
+def modify_mp3file(
+    mp3file,
+    new_file,
+    song,
+    cover_download: Future[Optional[bytes]],
+    keep_original,
+    extra_ffmpeg,
+    loudness_tolerance: Optional[float],
+):
+    if loudness_tolerance is not None and abs(measure_loudness(mp3file) - LOUDNESS_TARGET) <= loudness_tolerance:
+        logger.debug(f"skipping normalization of already normalized mp3file: {mp3file} --> {new_file}")
+        copy_or_move(mp3file, new_file, keep_original)
+    else:
+        logger.debug(f"normalizing audio volume of mp3file: {mp3file} --> {new_file}")
+        # write the normalized audio directly to its new location
+        normalize_mp3file(mp3file, new_file, extra_ffmpeg)
+        remove_original(mp3file, new_file, keep_original)
+    mp3file = new_file
     logger.debug(f"writing mp3tags to mp3file: {song} --> {mp3file}")
-    write_mp3tags(mp3file, song, extra_sacad)
-    logger.debug(f"normalizing audio volume of mp3file: {mp3file}")
-    normalize_mp3file(mp3file, extra_ffmpeg)
+    write_mp3tags(mp3file, song, cover_download.result())
     return mp3file
 
 
+def submit_fingerprints(mp3files, executor: ThreadPoolExecutor, fingerprints: queue.Queue):
+    try:
+        for mp3file in mp3files:
+            logger.debug(f"start fingerprinting mp3file: {mp3file}")
+            fingerprints.put((mp3file, executor.submit(fingerprint_mp3file, mp3file)))
+    finally:
+        # always mark the end to not leave the consumer waiting when the download fails
+        fingerprints.put(None)
+
+
+def fingerprint_mp3files(mp3files, executor: ThreadPoolExecutor) -> Iterator[tuple[str, Future]]:
+    fingerprints: queue.Queue[Optional[tuple[str, Future]]] = queue.Queue()
+    # consume the mp3files in a separate thread to hand out fingerprints while later mp3files still download
+    with ThreadPoolExecutor(max_workers=1) as producer:
+        submission = producer.submit(submit_fingerprints, mp3files, executor, fingerprints)
+        while (fingerprinting := fingerprints.get()) is not None:
+            yield fingerprinting
+        # propagate a failed download
+        submission.result()
+
+
+def resolve_songs(fingerprints, manual, skip, skip_directory, keep_original) -> Iterator[tuple[str, Song]]:
+    # defer the interactive corrections until all other mp3files are handed out to not hold back their modification
+    unconfident = []
+    for mp3file, fingerprinting in fingerprints:
+        song, confident, duration, fingerprint = fingerprinting.result()
+        logger.debug(f"fingerprinting finished for mp3file {mp3file} with result: {song}")
+
+        # earlier user corrections of the same audio take precedence over the automatic match
+        if (correction := load_correction(duration, fingerprint)) is not None:
+            song, confident = correction, True
+            logger.debug(f"using previously user-corrected song attributes: {song}")
+
+        if confident and not manual:
+            yield mp3file, song
+            continue
+
+        logger.debug(f"low confidence for the correctness of the fingerprinting result")
+        if skip:
+            new_file = os.path.join(skip_directory, os.path.basename(mp3file))
+            copy_or_move(mp3file, new_file, keep_original)
+            logger.info(f"skipped processing of song and place mp3file in: {new_file}")
+        else:
+            unconfident.append((mp3file, song, duration, fingerprint))
+
+    for mp3file, song, duration, fingerprint in unconfident:
+        song, adjusted = ask_user(mp3file, song, duration, fingerprint)
+        # only remember songs the user explicitly adjusted
+        if adjusted:
+            save_correction(duration, fingerprint, song)
+            logger.debug(f"using user-corrected song attributes: {song}")
+        yield mp3file, song
+
+
 def main(arguments=None):
     arguments = get_argument_parser().parse_args(args=arguments)
     logger.setLevel(logging.WARNING - arguments.verbose * 10)
 
     logger.debug(f"received the following arguments: {arguments}")
 
-    mp3files = (
-        arguments.urls
-        if arguments.files
-        else download_mp3files(arguments.urls, arguments.download_directory, arguments.extra_youtube_dl)
-    )
-    logger.debug(f"all mp3files to process: {mp3files}")
-
-    for mp3file in mp3files:
-        logger.info(f"start processing mp3file: {mp3file}")
-
-        song, confident = fingerprint_mp3file(mp3file)
-        logger.debug(f"fingerprinting finished with result: {song}")
-
-        if not confident or arguments.manual:
-            logger.debug(f"low confidence for the correctness of the fingerprinting result")
-            if arguments.skip:
-                os.makedirs(arguments.skip_directory, exist_ok=True)
-                new_file = os.path.join(arguments.skip_directory, os.path.basename(mp3file))
-                copy_or_move(mp3file, new_file, arguments.keep)
-                logger.info(f"skipped processing of song and place mp3file in: {new_file}")
-            else:
-                song = ask_user(mp3file, song)
-                logger.debug(f"using user-corrected song attributes: {song}")
-
-        mp3file = modify_mp3file(
-            mp3file,
-            song,
-            arguments.output_directory,
-            arguments.keep,
-            arguments.extra_sacad,
-            arguments.extra_ffmpeg_normalize,
-        )
-        logger.info(f"wrote result to mp3file: {mp3file}")
+    # create the output directories
+    os.makedirs(arguments.output_directory, exist_ok=True)
+    if arguments.skip:
+        os.makedirs(arguments.skip_directory, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=arguments.jobs) as executor:
+        try:
+            mp3files = (
+                arguments.urls
+                if arguments.files
+                else download_mp3files(arguments.urls, arguments.download_directory, arguments.extra_youtube_dl)
+            )
+            cover_downloads: dict[tuple[str, str], Future[Optional[bytes]]] = {}
+            new_files: set[str] = set()
+            futures = []
+            # fingerprinting and modifying are independent per mp3file and spend most of their time in subprocesses
+            # and network requests, only the interactive corrections in between need to happen sequentially
+            fingerprints = fingerprint_mp3files(mp3files, executor)
+            for mp3file, song in resolve_songs(
+                fingerprints, arguments.manual, arguments.skip, arguments.skip_directory, arguments.keep
+            ):
+                # concurrent modifications of the same new file would race on it, so only the first one is processed
+                new_file = get_song_file(song, arguments.output_directory)
+                if os.path.abspath(new_file) in new_files:
+                    logger.warning(
+                        f"skipped processing of mp3file {mp3file} because another one is already written to: {new_file}"
+                    )
+                    continue
+                new_files.add(os.path.abspath(new_file))
+
+                # download every cover only once per run and in the background to hide the network latency behind the
+                # normalization, the download is always submitted before the modification waiting for it
+                cover_key = (song.artist, song.album.removesuffix(" - Single"))
+                if cover_key not in cover_downloads:
+                    logger.debug(f"downloading cover art for artist and album: {cover_key}")
+                    cover_downloads[cover_key] = executor.submit(download_cover, *cover_key, arguments.extra_sacad)
+
+                logger.info(f"start modifying mp3file: {mp3file}")
+                future = executor.submit(
+                    modify_mp3file,
+                    mp3file,
+                    new_file,
+                    song,
+                    cover_downloads[cover_key],
+                    arguments.keep,
+                    arguments.extra_ffmpeg_normalize,
+                    arguments.loudness_tolerance,
+                )
+                futures.append(future)
+
+            for future in futures:
+                logger.info(f"wrote result to mp3file: {future.result()}")
+        except BaseException:
+            # cancel all queued jobs to stop right away on errors and interrupts
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
 
     try:
         os.rmdir(arguments.download_directory)